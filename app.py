@@ -4,6 +4,16 @@ import os
 from youtube_transcript_api import YouTubeTranscriptApi
 import requests
 import json
+import time
+from transcript_index import BM25Index, chunk_segments, format_timestamp
+from search_index import SearchIndex
+from archive import Archive
+from prompts import LANGUAGES, build_summary_prompt, max_transcript_length
+
+# 本地数据目录，用于保存历史摘要的检索索引
+DATA_DIR = os.environ.get("YT_SUMMARY_DATA_DIR", "data")
+SEARCH_INDEX_PATH = os.path.join(DATA_DIR, "search_index.db")
+ARCHIVE_PATH = os.path.join(DATA_DIR, "archive")
 
 # 设置页面配置
 st.set_page_config(
@@ -96,7 +106,9 @@ def custom_error(text):
 # 侧边栏设置
 with st.sidebar:
     st.title("设置")
+    page = st.radio("页面", ["生成摘要", "搜索历史"], index=0)
     show_debug = st.checkbox("显示调试信息", value=False)
+    lazy_render = st.checkbox("按需渲染", value=True, help="折叠的内容和视频播放器只在打开时发送，长字幕按时间分页显示，以减少每次刷新的数据量")
     api_provider = st.radio("API提供商", ["OpenRouter", "GitHub"], index=0)
     
     if api_provider == "OpenRouter":
@@ -126,6 +138,33 @@ with st.sidebar:
         if os.path.exists('.streamlit'):
             st.write(f".streamlit/secrets.toml存在: {os.path.exists('.streamlit/secrets.toml')}")
 
+# st.fragment 不可用时退化为普通函数
+fragment = getattr(st, "fragment", lambda func: func)
+
+def track_payload(name, text):
+    """累计本次刷新发送到前端的文本字节数"""
+    if text:
+        sizes = st.session_state.setdefault("payload_sizes", {})
+        sizes[name] = sizes.get(name, 0) + len(text.encode("utf-8"))
+
+def show_payload_sizes():
+    """在侧边栏显示本次刷新各部分的文本数据量"""
+    sizes = st.session_state.get("payload_sizes", {})
+    st.sidebar.write(f"本次刷新发送文本: {sum(sizes.values()) / 1024:.1f} KB")
+    for name, size in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+        st.sidebar.write(f"- {name}: {size / 1024:.1f} KB")
+
+def lazy_section(label, key):
+    """按需渲染模式下用开关代替展开器，关闭时不发送其中的内容
+
+    返回用于渲染内容的容器，未打开时返回 None。
+    """
+    if not lazy_render:
+        return st.expander(label)
+    if st.toggle(label, key=key):
+        return st.container()
+    return None
+
 def extract_video_id(url):
     """从各种格式的 YouTube URL 中提取视频 ID"""
     if not url:
@@ -145,8 +184,24 @@ def extract_video_id(url):
     
     return None
 
+def to_segments(items):
+    """将字幕条目统一为包含 text、start、duration 的片段列表"""
+    segments = []
+    for item in items:
+        if isinstance(item, dict) and "text" in item:
+            segments.append({
+                "text": item["text"],
+                "start": float(item.get("start") or 0.0),
+                "duration": float(item.get("duration") or 0.0),
+            })
+    return segments
+
+def segments_to_text(segments):
+    """将字幕片段拼接为完整文本"""
+    return " ".join([s["text"] for s in segments])
+
 def get_transcript_with_proxy(video_id, language_code='en'):
-    """使用代理API获取字幕"""
+    """使用代理API获取字幕片段"""
     try:
         proxy_url = f"https://yt.vl.comp.polyu.edu.hk/transcript?language_code={language_code}&password=for_demo&video_id={video_id}"
         
@@ -172,47 +227,38 @@ def get_transcript_with_proxy(video_id, language_code='en'):
                 
                 # 处理不同的返回格式
                 if isinstance(data, list):
-                    # 列表格式，直接提取文本
-                    texts = []
-                    for item in data:
-                        if isinstance(item, dict) and "text" in item:
-                            texts.append(item["text"])
+                    # 列表格式，直接提取片段
+                    segments = to_segments(data)
                     
-                    if texts:
-                        return " ".join(texts)
+                    if segments:
+                        return segments
                 elif isinstance(data, dict):
                     # 字典格式，可能有不同的结构
                     if "transcript" in data and isinstance(data["transcript"], list):
                         # 如果有transcript字段且是列表
-                        texts = []
-                        for item in data["transcript"]:
-                            if isinstance(item, dict) and "text" in item:
-                                texts.append(item["text"])
+                        segments = to_segments(data["transcript"])
                         
-                        if texts:
-                            return " ".join(texts)
+                        if segments:
+                            return segments
                     elif "text" in data:
                         # 直接有text字段
-                        return data["text"]
+                        return to_segments([data])
                     else:
                         # 尝试迭代字典，看是否有字幕数据
-                        texts = []
-                        for key, value in data.items():
-                            if isinstance(value, dict) and "text" in value:
-                                texts.append(value["text"])
+                        segments = to_segments(data.values())
                         
-                        if texts:
-                            return " ".join(texts)
+                        if segments:
+                            return segments
                 
                 # 如果无法解析结构，返回原始内容
                 if show_debug:
                     st.sidebar.warning("无法解析数据结构，返回原始内容")
-                return str(data)
+                return to_segments([{"text": str(data)}])
             except Exception as json_e:
                 if show_debug:
                     st.sidebar.error(f"JSON解析错误: {str(json_e)}")
                 # 返回原始响应文本
-                return response.text
+                return to_segments([{"text": response.text}])
         else:
             if show_debug:
                 st.sidebar.error(f"代理API HTTP错误: {response.status_code}")
@@ -223,7 +269,11 @@ def get_transcript_with_proxy(video_id, language_code='en'):
         return None
 
 def get_transcript(video_id, language='en'):
-    """获取指定 YouTube 视频的字幕，带有自动故障转移到代理API"""
+    """获取指定 YouTube 视频的字幕，带有自动故障转移到代理API
+
+    返回 (字幕文本, 带时间戳的字幕片段列表, 实际获取到的字幕语言代码)，
+    失败时返回 (None, None, None)。
+    """
     # 转换语言代码为YouTube API可接受的格式
     language_code = language
     if language == 'zh-CN':
@@ -244,7 +294,8 @@ def get_transcript(video_id, language='en'):
         if show_debug:
             st.sidebar.success("成功直接获取字幕")
         
-        return " ".join([t["text"] for t in transcript])
+        segments = to_segments(transcript)
+        return segments_to_text(segments), segments, language
     except Exception as e:
         custom_warning(f"直接获取字幕失败: {str(e)}")
         
@@ -252,12 +303,12 @@ def get_transcript(video_id, language='en'):
         custom_info = st.empty()
         custom_info.markdown(f'<div class="info-message">正在尝试使用代理API获取字幕...</div>', unsafe_allow_html=True)
         
-        transcript_text = get_transcript_with_proxy(video_id, language_code)
+        segments = get_transcript_with_proxy(video_id, language_code)
         
-        if transcript_text:
+        if segments:
             custom_info.empty()
             custom_success("成功通过代理API获取字幕")
-            return transcript_text
+            return segments_to_text(segments), segments, language
         
         # 如果特定语言失败，尝试英文
         if language_code != 'en':
@@ -269,20 +320,21 @@ def get_transcript(video_id, language='en'):
                 custom_info.empty()
                 custom_success("成功获取英文字幕")
                 custom_warning(f"未能获取{language}字幕，将使用英文字幕")
-                return " ".join([t["text"] for t in en_transcript])
+                en_segments = to_segments(en_transcript)
+                return segments_to_text(en_segments), en_segments, 'en'
             except:
                 # 再尝试通过代理获取英文
-                en_transcript_text = get_transcript_with_proxy(video_id, 'en')
+                en_segments = get_transcript_with_proxy(video_id, 'en')
                 
-                if en_transcript_text:
+                if en_segments:
                     custom_info.empty()
                     custom_success("成功通过代理API获取英文字幕")
                     custom_warning(f"未能获取{language}字幕，将使用英文字幕")
-                    return en_transcript_text
+                    return segments_to_text(en_segments), en_segments, 'en'
         
         custom_info.empty()
         custom_error("无法获取任何语言的字幕")
-        return None
+        return None, None, None
 
 def get_api_credentials():
     """获取API凭证"""
@@ -393,21 +445,16 @@ def get_api_credentials():
     return api_key, api_endpoint, model_name, api_source
 
 def generate_summary(transcript, language, api_key, api_endpoint, model_name, api_source, detailed=False):
-    """使用 LLM API 生成摘要"""
+    """使用 LLM API 生成摘要，返回 (摘要, 提示词, token 用量)"""
     if not transcript:
-        return None, None
+        return None, None, {}
     
-    # 限制文本长度，防止超过模型的最大输入限制
-    max_length = 12000 if api_source == "openrouter" else 8000
-    if len(transcript) > max_length:
-        transcript_truncated = transcript[:max_length] + "... [内容过长，已截断]"
-    else:
-        transcript_truncated = transcript
-    
-    summary_type = "详细摘要" if detailed else "摘要"
-    
-    system_prompt = f"你是一个帮助用户总结 YouTube 视频内容的助手，提供清晰简洁的摘要。"
-    user_prompt = f"请为这个 YouTube 视频字幕提供一个{summary_type}，使用{language}语言。重点关注主要内容和关键信息：{transcript_truncated}"
+    system_prompt, user_prompt = build_summary_prompt(
+        transcript,
+        language,
+        detailed=detailed,
+        max_length=max_transcript_length(api_source)
+    )
     
     # 根据来源（GitHub 或 OpenRouter）准备 API 请求
     headers = {
@@ -473,7 +520,7 @@ def generate_summary(transcript, language, api_key, api_endpoint, model_name, ap
             else:  # OpenRouter
                 summary = response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
             
-            return summary, user_prompt
+            return summary, user_prompt, response_data.get("usage") or {}
     except Exception as e:
         custom_error(f"生成摘要时出错: {str(e)}")
         # 添加更详细的错误信息
@@ -523,15 +570,198 @@ def generate_summary(transcript, language, api_key, api_endpoint, model_name, ap
                     summary = response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
                     
                     st.success("成功使用备用API生成摘要")
-                    return summary, user_prompt
+                    return summary, user_prompt, response_data.get("usage") or {}
             except Exception as backup_e:
                 if show_debug:
                     st.sidebar.error(f"备用API也失败: {str(backup_e)}")
-                return None, user_prompt
-        return None, user_prompt
+                return None, user_prompt, {}
+        return None, user_prompt, {}
+
+# 问答模式的系统提示词保持不变，使服务端的提示词缓存可以命中
+QA_SYSTEM_PROMPT = (
+    "你是一个回答 YouTube 视频相关问题的助手。"
+    "请仅根据提供的视频摘要和字幕片段回答问题，"
+    "引用字幕内容时在句末用方括号标注时间戳，例如 [03:25]。"
+    "如果提供的内容不足以回答问题，请直接说明。"
+)
+
+@st.cache_resource
+def get_search_index():
+    """获取跨会话共享的历史摘要检索索引"""
+    return SearchIndex(SEARCH_INDEX_PATH)
+
+@st.cache_resource
+def get_archive():
+    """获取字幕和摘要的列式归档"""
+    return Archive(ARCHIVE_PATH)
+
+def add_to_archive(video_id, transcript_language, segments, language, summary, summary_type, model_name, api_source, usage, latency_ms):
+    """将字幕片段和摘要记录追加到归档，字幕和摘要分别记录各自的语言代码
+
+    同一会话中已归档过的字幕不再重复写入，只追加摘要记录。
+    """
+    if "archived_transcripts" not in st.session_state:
+        st.session_state.archived_transcripts = set()
+    
+    try:
+        archive = get_archive()
+        transcript_key = (video_id, transcript_language)
+        if transcript_key not in st.session_state.archived_transcripts:
+            archive.append_transcript(video_id, transcript_language, segments)
+            st.session_state.archived_transcripts.add(transcript_key)
+        archive.append_summary(
+            video_id,
+            language,
+            summary_type,
+            model_name,
+            api_source,
+            summary,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            latency_ms=latency_ms
+        )
+    except Exception as e:
+        if show_debug:
+            st.sidebar.error(f"写入归档时出错: {str(e)}")
+
+def add_to_search_index(video_id, transcript_language, segments, language, summary, summary_type):
+    """将新生成的摘要和字幕增量写入历史检索索引"""
+    try:
+        search_index = get_search_index()
+        search_index.add_video(video_id, transcript_language, segments=segments)
+        search_index.add_video(video_id, language, summary=summary, summary_type=summary_type)
+    except Exception as e:
+        if show_debug:
+            st.sidebar.error(f"写入检索索引时出错: {str(e)}")
+
+def get_transcript_pages(video_id, segments, page_seconds):
+    """按时间范围将字幕分页，结果缓存在会话状态中，字幕更新时由 set_transcript 清除"""
+    if "transcript_pages" not in st.session_state:
+        st.session_state.transcript_pages = {}
+    
+    if page_seconds not in st.session_state.transcript_pages:
+        st.session_state.transcript_pages[page_seconds] = chunk_segments(
+            segments, window_seconds=page_seconds, max_chars=float("inf")
+        )
+    
+    return st.session_state.transcript_pages[page_seconds]
+
+@fragment
+def transcript_pager(video_id, segments, page_seconds=300):
+    """按时间范围分页显示字幕，翻页时只刷新此部分"""
+    pages = get_transcript_pages(video_id, segments, page_seconds)
+    if not pages:
+        return
+    
+    page = st.select_slider(
+        "时间范围",
+        options=list(range(len(pages))),
+        format_func=lambda i: f"{format_timestamp(pages[i]['start'])} - {format_timestamp(pages[i]['end'])}",
+        key=f"transcript_page_{video_id}"
+    ) if len(pages) > 1 else 0
+    
+    text = pages[page]["text"]
+    track_payload("字幕", text)
+    st.text_area("字幕内容", text, height=200)
+
+def set_transcript(transcript, segments, transcript_language):
+    """更新当前字幕，并清除基于旧字幕构建的缓存"""
+    st.session_state.transcript = transcript
+    st.session_state.transcript_segments = segments
+    st.session_state.transcript_language = transcript_language
+    st.session_state.qa_index = None
+    st.session_state.transcript_pages = {}
+
+def get_transcript_index(video_id, segments):
+    """获取当前字幕的 BM25 索引，只构建一次，字幕更新时由 set_transcript 清除"""
+    if st.session_state.get("qa_index") is None:
+        st.session_state.qa_index = BM25Index(chunk_segments(segments))
+        if show_debug:
+            st.sidebar.write(f"已为视频 {video_id} 构建字幕索引，共 {len(st.session_state.qa_index)} 个片段")
+    
+    return st.session_state.qa_index
+
+def post_chat_completion(messages, api_key, api_endpoint, model_name, api_source):
+    """发送聊天补全请求并返回回复内容"""
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+    }
+    if api_source == "openrouter":
+        headers["HTTP-Referer"] = "https://streamlit.io/"
+        headers["X-Title"] = "YouTube Video Summarizer"
+    
+    payload = {
+        "model": model_name,
+        "messages": messages
+    }
+    
+    json_payload = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    response = requests.post(
+        api_endpoint,
+        headers=headers,
+        data=json_payload,
+        timeout=60
+    )
+    
+    if show_debug:
+        st.sidebar.write(f"问答API响应状态码: {response.status_code}")
+    
+    response.raise_for_status()
+    response_data = response.json()
+    return response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+def answer_question(question, summary, index, language, api_key, api_endpoint, model_name, api_source, top_k=5):
+    """根据摘要和检索到的字幕片段回答问题，返回 (回答, 引用的片段)"""
+    chunks = index.search(question, top_k=top_k)
+    # 按时间顺序排列片段，便于模型理解上下文
+    chunks.sort(key=lambda c: c["start"])
+    
+    # 摘要部分对同一视频保持不变，放在问题之前以形成稳定的提示词前缀
+    context = f"请使用{language}回答。\n\n视频摘要：\n{summary}"
+    excerpts = "\n".join([f"[{format_timestamp(c['start'])}] {c['text']}" for c in chunks]) or "（未检索到相关字幕片段）"
+    question_text = f"相关字幕片段：\n{excerpts}\n\n问题：{question}"
+    
+    if api_source == "openrouter" and model_name.startswith("anthropic/"):
+        # Anthropic 模型需要显式标记可缓存的内容块
+        user_content = [
+            {"type": "text", "text": context, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": question_text}
+        ]
+    else:
+        user_content = f"{context}\n\n{question_text}"
+    
+    messages = [
+        {"role": "system", "content": QA_SYSTEM_PROMPT},
+        {"role": "user", "content": user_content}
+    ]
+    
+    try:
+        with st.spinner("正在检索并回答..."):
+            if show_debug:
+                st.sidebar.write(f"问答检索到 {len(chunks)} 个片段，发送字符数: {len(context) + len(question_text)}")
+            answer = post_chat_completion(messages, api_key, api_endpoint, model_name, api_source)
+            return answer, chunks
+    except Exception as e:
+        custom_error(f"回答问题时出错: {str(e)}")
+        return None, chunks
+
+def render_qa_item(item, video_id):
+    """显示一条问答及其引用的字幕片段"""
+    track_payload("问答", item["answer"])
+    st.markdown(f"**问：** {item['question']}")
+    st.markdown(item["answer"])
+    if item["sources"]:
+        links = [
+            f"[{format_timestamp(c['start'])}](https://www.youtube.com/watch?v={video_id}&t={int(c['start'])}s)"
+            for c in item["sources"]
+        ]
+        st.caption("引用片段: " + " · ".join(links))
+    st.markdown("---")
 
 def main():
     st.title("YouTube 视频摘要生成器")
+    st.session_state.payload_sizes = {}
     
     # 获取 API 凭证
     with st.spinner("正在初始化..."):
@@ -554,16 +784,7 @@ def main():
         youtube_url = st.text_input("YouTube URL", placeholder="https://www.youtube.com/watch?v=...")
         
         # 语言选择
-        languages = {
-            "en": "英语",
-            "zh-TW": "繁体中文",
-            "zh-CN": "简体中文",
-            "es": "西班牙语",
-            "fr": "法语",
-            "de": "德语",
-            "ja": "日语",
-            "ko": "韩语"
-        }
+        languages = LANGUAGES
         
         selected_language = st.selectbox(
             "选择语言",
@@ -585,6 +806,10 @@ def main():
             st.session_state.video_id = None
         if "transcript" not in st.session_state:
             st.session_state.transcript = None
+        if "transcript_segments" not in st.session_state:
+            st.session_state.transcript_segments = None
+        if "qa_history" not in st.session_state:
+            st.session_state.qa_history = []
         
         # 生成摘要按钮
         col1, col2 = st.columns(2)
@@ -603,21 +828,33 @@ def main():
             is_detailed = generate_detailed_btn
             video_id = extract_video_id(youtube_url)
             if video_id:
+                if video_id != st.session_state.video_id:
+                    # 切换视频时清空上一个视频的结果，避免摘要和字幕片段混用
+                    st.session_state.summary = None
+                    st.session_state.detailed_summary = None
+                    st.session_state.user_prompt = None
+                    st.session_state.detailed_user_prompt = None
+                    set_transcript(None, None, None)
+                    st.session_state.qa_history = []
                 st.session_state.video_id = video_id
                 with st.spinner("正在获取字幕..."):
-                    transcript = get_transcript(video_id, selected_language)
+                    transcript, segments, transcript_language = get_transcript(video_id, selected_language)
                     if transcript:
-                        st.session_state.transcript = transcript
+                        set_transcript(transcript, segments, transcript_language)
                 
                 if transcript:
                     if show_debug:
                         st.write(f"获取到的字幕长度: {len(transcript)}")
                     
-                    # 显示字幕预览
-                    with st.expander("查看获取到的字幕"):
-                        st.text_area("字幕内容", transcript[:2000] + ("..." if len(transcript) > 2000 else ""), height=200)
+                    # 显示字幕预览，按需渲染模式下在右侧分页查看
+                    if not lazy_render:
+                        with st.expander("查看获取到的字幕"):
+                            preview = transcript[:2000] + ("..." if len(transcript) > 2000 else "")
+                            track_payload("字幕", preview)
+                            st.text_area("字幕内容", preview, height=200)
                     
-                    summary, prompt = generate_summary(
+                    start_time = time.perf_counter()
+                    summary, prompt, usage = generate_summary(
                         transcript, 
                         languages[selected_language],
                         api_key,
@@ -627,7 +864,23 @@ def main():
                         detailed=is_detailed
                     )
                     
+                    latency_ms = (time.perf_counter() - start_time) * 1000
+                    
                     if summary:
+                        summary_type = "detailed_summary" if is_detailed else "summary"
+                        add_to_search_index(video_id, transcript_language, segments, selected_language, summary, summary_type)
+                        add_to_archive(
+                            video_id,
+                            transcript_language,
+                            segments,
+                            selected_language,
+                            summary,
+                            summary_type,
+                            model_name,
+                            api_source,
+                            usage,
+                            latency_ms
+                        )
                         if is_detailed:
                             st.session_state.detailed_summary = summary
                             st.session_state.detailed_user_prompt = prompt
@@ -668,21 +921,118 @@ def main():
                 st.write(f"Video URL: [{video_url}]({video_url})")
                 
                 # 嵌入视频播放器
-                st.video(video_url)
+                if not lazy_render or st.toggle("嵌入视频播放器", key="show_video"):
+                    st.video(video_url)
             
             # 创建一个带样式的容器来显示摘要
             st.markdown('<div class="summary-container">', unsafe_allow_html=True)
+            track_payload("摘要", summary)
             st.markdown(summary)
             st.markdown('</div>', unsafe_allow_html=True)
             
-            # 创建展开器来显示提示词和原始输出
-            with st.expander("查看提示词"):
-                st.text_area("使用的提示词:", prompt, height=150)
+            # 创建展开器来显示提示词、原始输出和字幕
+            section = lazy_section("查看提示词", "show_prompt")
+            if section:
+                with section:
+                    track_payload("提示词", prompt)
+                    st.text_area("使用的提示词:", prompt, height=150)
+            
+            section = lazy_section("查看原始输出", "show_raw_output")
+            if section:
+                with section:
+                    track_payload("原始输出", summary)
+                    st.text_area("原始输出:", summary, height=300)
             
-            with st.expander("查看原始输出"):
-                st.text_area("原始输出:", summary, height=300)
+            if lazy_render and st.session_state.transcript_segments:
+                section = lazy_section("查看字幕", "show_transcript")
+                if section:
+                    with section:
+                        transcript_pager(st.session_state.video_id, st.session_state.transcript_segments)
+            
+            # 视频问答：只发送检索到的字幕片段和摘要，而不是完整字幕
+            if st.session_state.transcript_segments:
+                st.markdown("### 视频问答")
+                with st.form("qa_form", clear_on_submit=True):
+                    question = st.text_input("针对该视频提问", placeholder="例如：视频中提到了哪些关键观点？")
+                    ask_btn = st.form_submit_button("提问")
+                
+                if ask_btn and question:
+                    index = get_transcript_index(st.session_state.video_id, st.session_state.transcript_segments)
+                    answer, sources = answer_question(
+                        question,
+                        summary,
+                        index,
+                        languages[selected_language],
+                        api_key,
+                        api_endpoint,
+                        model_name,
+                        api_source
+                    )
+                    if answer:
+                        st.session_state.qa_history.append({
+                            "question": question,
+                            "answer": answer,
+                            "sources": sources
+                        })
+                
+                # 最新的问答显示在最上方，按需渲染模式下较早的问答折叠
+                history = list(reversed(st.session_state.qa_history))
+                recent, older = (history[:3], history[3:]) if lazy_render else (history, [])
+                for item in recent:
+                    render_qa_item(item, st.session_state.video_id)
+                if older:
+                    section = lazy_section(f"查看更早的 {len(older)} 条问答", "show_older_qa")
+                    if section:
+                        with section:
+                            for item in older:
+                                render_qa_item(item, st.session_state.video_id)
         else:
             st.info("请在左侧输入YouTube视频URL并选择语言，然后点击生成摘要按钮")
+    
+    if show_debug:
+        show_payload_sizes()
+
+def search_page():
+    st.title("搜索历史摘要")
+    
+    search_index = get_search_index()
+    st.caption(f"已索引 {search_index.count_videos()} 个视频")
+    
+    query = st.text_input("搜索关键词", placeholder="例如：机器学习")
+    if not query:
+        st.info("输入关键词以搜索所有已生成摘要的视频字幕和摘要")
+        return
+    
+    start_time = time.perf_counter()
+    results = search_index.search(query)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    
+    if not results:
+        custom_warning("没有找到相关视频")
+        return
+    
+    st.write(f"找到 {len(results)} 个相关视频（{elapsed_ms:.1f} 毫秒）")
+    
+    kind_labels = {
+        "transcript": "字幕",
+        "summary": "摘要",
+        "detailed_summary": "详细摘要"
+    }
+    
+    for result in results:
+        video_url = f"https://www.youtube.com/watch?v={result['video_id']}"
+        st.markdown(f"#### [{result['video_id']}]({video_url})")
+        for snippet in result["snippets"]:
+            label = kind_labels.get(snippet["kind"], snippet["kind"])
+            if snippet["kind"] == "transcript":
+                link = f"{video_url}&t={int(snippet['start'])}s"
+                st.markdown(f"- [{format_timestamp(snippet['start'])}]({link}) {snippet['text']}")
+            else:
+                st.markdown(f"- **{label}**: {snippet['text']}")
+        st.markdown("---")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if page == "搜索历史":
+        search_page()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,331 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from prompts import LANGUAGES, build_summary_prompt, max_transcript_length
+
+# 字幕片段表：每行一个片段，text_offset/text_length 指向拼接后的完整字幕文本
+SEGMENT_SCHEMA = pa.schema([
+    ("video_id", pa.string()),
+    ("language", pa.string()),
+    ("seq", pa.int32()),
+    ("start", pa.float64()),
+    ("duration", pa.float64()),
+    ("text_offset", pa.int64()),
+    ("text_length", pa.int32()),
+    ("text", pa.string()),
+])
+
+# 摘要表：每行一次摘要生成
+SUMMARY_SCHEMA = pa.schema([
+    ("video_id", pa.string()),
+    ("language", pa.string()),
+    ("summary_type", pa.string()),
+    ("model", pa.string()),
+    ("api_source", pa.string()),
+    ("prompt_tokens", pa.int32()),
+    ("completion_tokens", pa.int32()),
+    ("latency_ms", pa.float64()),
+    ("created_at", pa.timestamp("ms", tz="UTC")),
+    ("summary", pa.string()),
+])
+
+TABLES = {
+    "segments": SEGMENT_SCHEMA,
+    "summaries": SUMMARY_SCHEMA,
+}
+
+
+class Archive:
+    """只追加的字幕和摘要归档，以 zstd 压缩的 Parquet 列式文件保存
+
+    每次追加写入一个新的段文件，已有文件不会被修改；读取时通过内存映射逐批读取，
+    因此导出和批量重新摘要不需要把整个归档载入内存。
+    """
+
+    def __init__(self, root, compression_level=9):
+        self.root = root
+        self.compression_level = compression_level
+        for table in TABLES:
+            os.makedirs(os.path.join(root, table), exist_ok=True)
+            if os.path.exists(self._manifest_path(table)):
+                self._finish_compact(table)
+
+    def _files(self, table):
+        directory = os.path.join(self.root, table)
+        return sorted(
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.endswith(".parquet")
+        )
+
+    def _write(self, table, batch):
+        """先写入临时文件再重命名，保证读取方不会看到写了一半的文件"""
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(self.root, table, name)
+        tmp_path = path + ".tmp"
+        pq.write_table(
+            pa.Table.from_batches([batch]),
+            tmp_path,
+            compression="zstd",
+            compression_level=self.compression_level,
+        )
+        os.replace(tmp_path, path)
+        return path
+
+    def append_transcript(self, video_id, language, segments):
+        """追加一个视频的字幕片段"""
+        rows = {name: [] for name in SEGMENT_SCHEMA.names}
+        offset = 0
+        for seq, segment in enumerate(segments):
+            text = segment["text"]
+            rows["video_id"].append(video_id)
+            rows["language"].append(language)
+            rows["seq"].append(seq)
+            rows["start"].append(float(segment.get("start") or 0.0))
+            rows["duration"].append(float(segment.get("duration") or 0.0))
+            rows["text_offset"].append(offset)
+            rows["text_length"].append(len(text))
+            rows["text"].append(text)
+            # 与 segments_to_text 一致，片段之间以一个空格连接
+            offset += len(text) + 1
+        return self._write("segments", pa.record_batch(rows, schema=SEGMENT_SCHEMA))
+
+    def append_summary(self, video_id, language, summary_type, model, api_source, summary,
+                       prompt_tokens=None, completion_tokens=None, latency_ms=None):
+        """追加一条摘要记录"""
+        row = {
+            "video_id": [video_id],
+            "language": [language],
+            "summary_type": [summary_type],
+            "model": [model],
+            "api_source": [api_source],
+            "prompt_tokens": [prompt_tokens],
+            "completion_tokens": [completion_tokens],
+            "latency_ms": [latency_ms],
+            "created_at": [datetime.now(timezone.utc)],
+            "summary": [summary],
+        }
+        return self._write("summaries", pa.record_batch(row, schema=SUMMARY_SCHEMA))
+
+    def iter_batches(self, table, columns=None, batch_size=65536):
+        """按文件顺序以内存映射方式逐批读取某张表"""
+        return self._iter_file_batches(self._files(table), columns, batch_size)
+
+    def _iter_file_batches(self, files, columns=None, batch_size=65536):
+        for path in files:
+            parquet_file = pq.ParquetFile(path, memory_map=True)
+            for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+                yield batch
+
+    def iter_transcripts(self, language=None, unique=True):
+        """逐个视频重建完整字幕，返回 (video_id, language, text)
+
+        同一份字幕的片段在归档中是连续的，因此只需缓存当前视频的片段。
+        unique 为 True 时同一视频和语言只返回第一次归档的字幕。
+        """
+        seen = set()
+        current_key = None
+        texts = []
+
+        for batch in self.iter_batches("segments", columns=["video_id", "language", "seq", "text"]):
+            columns = batch.to_pydict()
+            for video_id, lang, seq, text in zip(columns["video_id"], columns["language"], columns["seq"], columns["text"]):
+                key = (video_id, lang)
+                # seq 从 0 开始表示新归档的一份字幕
+                if key != current_key or seq == 0:
+                    if current_key and texts:
+                        yield current_key[0], current_key[1], " ".join(texts)
+                    current_key = key
+                    texts = []
+                    skip = (language and lang != language) or (unique and key in seen)
+                    seen.add(key)
+                if not skip:
+                    texts.append(text)
+
+        if current_key and texts:
+            yield current_key[0], current_key[1], " ".join(texts)
+
+    def export(self, table, path):
+        """将一张表导出为 .jsonl 或 .parquet 文件，逐批写出"""
+        if path.endswith(".parquet"):
+            with pq.ParquetWriter(path, TABLES[table], compression="zstd") as writer:
+                for batch in self.iter_batches(table):
+                    writer.write_batch(batch)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                for batch in self.iter_batches(table):
+                    for row in batch.to_pylist():
+                        f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+    def _manifest_path(self, table):
+        return os.path.join(self.root, table, "compact.manifest.json")
+
+    def _finish_compact(self, table):
+        """执行合并清单中记录的重命名和删除，可重复执行，用于合并中途崩溃后的恢复"""
+        directory = os.path.join(self.root, table)
+        manifest_path = self._manifest_path(table)
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        # 先删除旧文件再启用新文件，任一时刻同一行数据只会出现一次
+        for name in manifest["inputs"]:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+        for name in manifest["outputs"]:
+            tmp_path = os.path.join(directory, name)
+            if os.path.exists(tmp_path):
+                os.replace(tmp_path, tmp_path[:-len(".tmp")])
+        os.remove(manifest_path)
+
+    def compact(self, table, max_rows_per_file=1_000_000):
+        """将多个小段文件合并为较大的文件以减少打开文件的开销，内容和顺序保持不变
+
+        合并后的文件沿用第一个输入文件的时间戳前缀，因此合并期间追加的文件仍排在其后。
+        输出先写为临时文件，再通过清单记录替换步骤，崩溃后在下次打开归档时完成。
+        """
+        directory = os.path.join(self.root, table)
+        if os.path.exists(self._manifest_path(table)):
+            self._finish_compact(table)
+        # 清理之前中断且尚未写入清单的合并输出
+        for name in os.listdir(directory):
+            if "-compact-" in name and name.endswith(".parquet.tmp"):
+                os.remove(os.path.join(directory, name))
+
+        files = self._files(table)
+        if len(files) < 2:
+            return
+
+        prefix = os.path.basename(files[0]).split("-", 1)[0]
+        writer = None
+        rows = 0
+        tmp_paths = []
+        try:
+            for batch in self._iter_file_batches(files):
+                if writer is None or rows >= max_rows_per_file:
+                    if writer:
+                        writer.close()
+                    name = f"{prefix}-compact-{len(tmp_paths):06d}-{uuid.uuid4().hex[:8]}.parquet"
+                    tmp_paths.append(os.path.join(directory, name + ".tmp"))
+                    writer = pq.ParquetWriter(
+                        tmp_paths[-1],
+                        TABLES[table],
+                        compression="zstd",
+                        compression_level=self.compression_level,
+                    )
+                    rows = 0
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        finally:
+            if writer:
+                writer.close()
+
+        manifest_path = self._manifest_path(table)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "inputs": [os.path.basename(path) for path in files],
+                "outputs": [os.path.basename(path) for path in tmp_paths],
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(manifest_path + ".tmp", manifest_path)
+        self._finish_compact(table)
+
+
+async def resummarize(archive, language, model_type="github", model=None, detailed=False, source_language=None,
+                      limit=None, concurrency=8, batch_size=64):
+    """对归档中的字幕批量重新生成摘要并追加到归档
+
+    language 为语言代码（如 zh-CN），与应用写入归档的值一致。
+    字幕按 batch_size 分批从归档中读取，每批通过 llm.answer_many 并发请求。
+    """
+    import llm
+
+    model = model or llm.DEFAULT_MODELS[model_type]
+    max_length = max_transcript_length(model_type)
+    # 与应用内生成摘要的请求一致，不设置采样参数和最大输出长度
+    params = {name: None for name in llm.DEFAULT_PARAMS}
+
+    transcripts = archive.iter_transcripts(language=source_language)
+    if limit is not None:
+        transcripts = itertools.islice(transcripts, limit)
+
+    while True:
+        batch = list(itertools.islice(transcripts, batch_size))
+        if not batch:
+            break
+
+        prompts = [
+            build_summary_prompt(transcript, LANGUAGES[language], detailed=detailed, max_length=max_length)
+            for _, _, transcript in batch
+        ]
+
+        results = await llm.answer_many(prompts, model_type, concurrency=concurrency, model=model, **params)
+
+        for (video_id, _, _), result in zip(batch, results):
+            if result["error"]:
+                print(f"{video_id}: 生成摘要失败: {result['error']}")
+                continue
+            archive.append_summary(
+                video_id,
+                language,
+                "detailed_summary" if detailed else "summary",
+                model,
+                model_type,
+                result["content"],
+                prompt_tokens=result["usage"].get("prompt_tokens"),
+                completion_tokens=result["usage"].get("completion_tokens"),
+                latency_ms=result["latency_ms"],
+            )
+            print(f"{video_id}: 完成")
+
+
+# execute if the script is run directly
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="字幕和摘要归档工具")
+    parser.add_argument("--root", default=os.path.join(os.environ.get("YT_SUMMARY_DATA_DIR", "data"), "archive"))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="导出归档表")
+    export_parser.add_argument("table", choices=list(TABLES))
+    export_parser.add_argument("path", help="输出文件，.jsonl 或 .parquet")
+
+    compact_parser = subparsers.add_parser("compact", help="合并小文件")
+    compact_parser.add_argument("table", choices=list(TABLES))
+
+    resummarize_parser = subparsers.add_parser("resummarize", help="批量重新生成摘要")
+    resummarize_parser.add_argument("--language", default="zh-CN", choices=list(LANGUAGES), help="摘要使用的语言代码")
+    resummarize_parser.add_argument("--source-language", default=None, help="只处理该语言代码的字幕")
+    resummarize_parser.add_argument("--model-type", default="github", choices=["github", "openrouter"])
+    resummarize_parser.add_argument("--model", default=None, help="模型名称，默认使用 llm.DEFAULT_MODELS 中对应 API 的模型")
+    resummarize_parser.add_argument("--detailed", action="store_true")
+    resummarize_parser.add_argument("--limit", type=int, default=None)
+    resummarize_parser.add_argument("--concurrency", type=int, default=8, help="同时进行的请求数")
+
+    args = parser.parse_args()
+    archive = Archive(args.root)
+
+    if args.command == "export":
+        archive.export(args.table, args.path)
+    elif args.command == "compact":
+        archive.compact(args.table)
+    else:
+        asyncio.run(resummarize(
+            archive,
+            args.language,
+            args.model_type,
+            model=args.model,
+            detailed=args.detailed,
+            source_language=args.source_language,
+            limit=args.limit,
+            concurrency=args.concurrency,
+        ))
@@ -1,5 +1,5 @@
-import json, os, toml
-from openai import OpenAI
+import asyncio, json, os, time, toml
+from openai import AsyncOpenAI, OpenAI
 import streamlit as st
 
 # Load API key from credentials.txt or secrets manager
@@ -10,23 +10,38 @@ if os.path.exists(file_path):
 else:
     secrets = st.secrets
 
+DEFAULT_MODEL = "gpt-4o-mini"
+# OpenRouter model ids carry a provider prefix
+DEFAULT_MODELS = {
+    "github": DEFAULT_MODEL,
+    "openrouter": "openai/gpt-4o-mini",
+}
+DEFAULT_PARAMS = {
+    "temperature": 1.0,
+    "top_p": 1.0,
+    "max_tokens": 1000,
+}
 
-def answer(system_prompt, user_prompt, model_type="github"):
+# sync clients are reused across calls, keyed by model_type
+clients = {}
+
+
+def get_endpoint(model_type):
+    """Return (endpoint, token) for the given API type"""
     if model_type == "github":
         print("Answer using Github API")
         endpoint = "https://models.inference.ai.azure.com"
-        
 
-        if 'GITHUB' not in secrets and 'GITHUB_API_KEY' not in secrets:
+        if 'GITHUB' not in secrets or 'GITHUB_API_KEY' not in secrets['GITHUB']:
             # throw an error if the API key is not found
             raise ValueError("Github API key not found")
         else:
-            token = secrets['GITHUB']['GITHUB_API_KEY'] 
+            token = secrets['GITHUB']['GITHUB_API_KEY']
 
     elif model_type == "openrouter":
         print("Answer using Openrouter API")
-        endpoint="https://openrouter.ai/api/v1"
-        if 'OPENROUTER' not in secrets and 'OPENROUTER_API_KEY' not in secrets['OPENROUTER']:
+        endpoint = "https://openrouter.ai/api/v1"
+        if 'OPENROUTER' not in secrets or 'OPENROUTER_API_KEY' not in secrets['OPENROUTER']:
             # throw an error if the API key is not found
             raise ValueError("OpenRouter API key not found")
         else:
@@ -34,37 +49,157 @@ def answer(system_prompt, user_prompt, model_type="github"):
     else:
         raise ValueError("Invalid API type")
 
-    model_name = "gpt-4o-mini"
-
-    client = OpenAI(
-        base_url=endpoint,
-        api_key=token,
-    )
-
-    response = client.chat.completions.create(
-        messages=[
-            {
-                "role": "system",
-                "content": system_prompt,
-            },
-            {
-                "role": "user",
-                "content": user_prompt,
-            }
-        ],
-        temperature=1.0,
-        top_p=1.0,
-        max_tokens=1000,
-        model=model_name
-    )
+    return endpoint, token
+
+
+def get_client(model_type):
+    if model_type not in clients:
+        endpoint, token = get_endpoint(model_type)
+        clients[model_type] = OpenAI(base_url=endpoint, api_key=token)
+    return clients[model_type]
+
+
+def open_async_client(model_type):
+    """Create an AsyncOpenAI client; use it as `async with` so it is closed.
+
+    Async clients hold connections bound to the running event loop, so they
+    are not cached globally like the sync ones.
+    """
+    endpoint, token = get_endpoint(model_type)
+    return AsyncOpenAI(base_url=endpoint, api_key=token)
 
+
+def build_request(system_prompt, user_prompt, model=None, model_type="github", **params):
+    # passing None for a parameter leaves it out of the request
+    request = {key: value for key, value in dict(DEFAULT_PARAMS, **params).items() if value is not None}
+    request["model"] = model or DEFAULT_MODELS.get(model_type, DEFAULT_MODEL)
+    request["messages"] = [
+        {
+            "role": "system",
+            "content": system_prompt,
+        },
+        {
+            "role": "user",
+            "content": user_prompt,
+        }
+    ]
+    return request
+
+
+def answer(system_prompt, user_prompt, model_type="github", model=None, **params):
+    client = get_client(model_type)
+    response = client.chat.completions.create(**build_request(system_prompt, user_prompt, model, model_type, **params))
     return response.choices[0].message.content
-    
-        
+
+
+def usage_to_dict(usage):
+    """Convert the usage block of a response to a plain dict"""
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+    }
+
+
+async def answer_async(system_prompt, user_prompt, model_type="github", model=None, stream=False, on_delta=None,
+                       client=None, with_usage=False, **params):
+    """Async counterpart of answer.
+
+    With stream=True the response is streamed, on_delta(text) is called for
+    every received piece and the full text is returned at the end. Pass a
+    client from open_async_client to reuse it across calls; otherwise a
+    client is opened and closed for this call only. With with_usage=True a
+    (content, usage) tuple is returned, usage being a dict of token counts
+    (streamed requests ask for it with stream_options).
+    """
+    if client is None:
+        async with open_async_client(model_type) as client:
+            return await answer_async(system_prompt, user_prompt, model_type, model, stream, on_delta, client,
+                                      with_usage, **params)
+
+    request = build_request(system_prompt, user_prompt, model, model_type, **params)
+
+    if not stream:
+        response = await client.chat.completions.create(**request)
+        content = response.choices[0].message.content
+        return (content, usage_to_dict(response.usage)) if with_usage else content
+
+    if with_usage:
+        request["stream_options"] = {"include_usage": True}
+
+    parts = []
+    usage = None
+    async for chunk in await client.chat.completions.create(stream=True, **request):
+        # with include_usage the last chunk carries the usage and no choices
+        if getattr(chunk, "usage", None) is not None:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            if on_delta:
+                on_delta(delta)
+    content = "".join(parts)
+    return (content, usage_to_dict(usage)) if with_usage else content
+
+
+async def answer_many(prompts, model_type="github", concurrency=8, stream=False, on_delta=None, **params):
+    """Answer a list of prompts with bounded concurrency.
+
+    Each prompt is either a (system_prompt, user_prompt) tuple or a dict with
+    system_prompt, user_prompt and optional per-call overrides (model_type,
+    model, stream, temperature, max_tokens, ...). Results are returned in
+    input order as {"content": ..., "usage": ..., "error": ..., "latency_ms":
+    ...}; a failed call does not cancel the others. on_delta(index, text) receives streamed
+    pieces. One client per model_type is shared by all calls and closed
+    before returning.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    clients_by_type = {}
+
+    async def run(index, prompt):
+        if isinstance(prompt, dict):
+            kwargs = dict(params, **prompt)
+        else:
+            system_prompt, user_prompt = prompt
+            kwargs = dict(params, system_prompt=system_prompt, user_prompt=user_prompt)
+        kwargs.setdefault("model_type", model_type)
+        kwargs.setdefault("stream", stream)
+        if on_delta:
+            kwargs["on_delta"] = lambda delta: on_delta(index, delta)
+
+        async with semaphore:
+            start_time = time.perf_counter()
+            try:
+                if kwargs["model_type"] not in clients_by_type:
+                    clients_by_type[kwargs["model_type"]] = open_async_client(kwargs["model_type"])
+                kwargs["client"] = clients_by_type[kwargs["model_type"]]
+                (content, usage), error = await answer_async(with_usage=True, **kwargs), None
+            except Exception as e:
+                content, usage, error = None, {}, e
+            return {
+                "content": content,
+                "usage": usage,
+                "error": error,
+                "latency_ms": (time.perf_counter() - start_time) * 1000
+            }
+
+    try:
+        return await asyncio.gather(*(run(index, prompt) for index, prompt in enumerate(prompts)))
+    finally:
+        for client in clients_by_type.values():
+            await client.close()
+
+
 # execute if the script is run directly
 if __name__ == "__main__":
     # model_type = "openrouter"
     model_type = "github"
     result = answer("Answer in chinese", "What is the capital of France?", model_type)
     print(result)
-
@@ -0,0 +1,28 @@
+# 支持的摘要语言，键为语言代码，值为提示词中使用的语言名称
+LANGUAGES = {
+    "en": "英语",
+    "zh-TW": "繁体中文",
+    "zh-CN": "简体中文",
+    "es": "西班牙语",
+    "fr": "法语",
+    "de": "德语",
+    "ja": "日语",
+    "ko": "韩语"
+}
+
+SUMMARY_SYSTEM_PROMPT = "你是一个帮助用户总结 YouTube 视频内容的助手，提供清晰简洁的摘要。"
+
+
+def max_transcript_length(api_source):
+    """不同 API 提供商允许的字幕最大长度，防止超过模型的最大输入限制"""
+    return 12000 if api_source == "openrouter" else 8000
+
+
+def build_summary_prompt(transcript, language, detailed=False, max_length=12000):
+    """构造生成摘要的 (系统提示词, 用户提示词)，language 为语言名称"""
+    if len(transcript) > max_length:
+        transcript = transcript[:max_length] + "... [内容过长，已截断]"
+
+    summary_type = "详细摘要" if detailed else "摘要"
+    user_prompt = f"请为这个 YouTube 视频字幕提供一个{summary_type}，使用{language}语言。重点关注主要内容和关键信息：{transcript}"
+    return SUMMARY_SYSTEM_PROMPT, user_prompt
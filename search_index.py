@@ -0,0 +1,190 @@
+import os
+import sqlite3
+import threading
+import time
+
+from transcript_index import CJK_PATTERN, TOKEN_PATTERN, chunk_segments, tokenize
+
+# 索引格式版本，分词规则变化时需要递增，打开旧索引时会按新规则重建倒排表
+INDEX_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    start REAL NOT NULL DEFAULT 0,
+    text TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_video ON documents (video_id, language, kind);
+"""
+
+# 倒排表不保存内容（content=''），原文只存放在 documents 中
+FTS_SCHEMA = "CREATE VIRTUAL TABLE documents_fts USING fts5(tokens, content='')"
+
+
+def build_match_query(query):
+    """将查询文本转换为 FTS5 的 MATCH 表达式，所有检索词需同时出现
+
+    中日韩文字有双字时只使用双字，单字已被双字隐含，且常用单字的倒排表很长。
+    """
+    terms = []
+    for match in TOKEN_PATTERN.finditer(query.lower()):
+        word = match.group(0)
+        if CJK_PATTERN.match(word) and len(word) > 1:
+            tokens = [word[i:i + 2] for i in range(len(word) - 1)]
+        else:
+            tokens = [word]
+        for token in tokens:
+            term = '"' + token.replace('"', '""') + '"'
+            if term not in terms:
+                terms.append(term)
+    return " ".join(terms)
+
+
+def make_snippet(text, query, width=160):
+    """截取文本中第一个命中查询词附近的片段"""
+    lowered = text.lower()
+    position = -1
+    for token in sorted(set(tokenize(query)), key=len, reverse=True):
+        position = lowered.find(token)
+        if position >= 0:
+            break
+
+    if position < 0 or len(text) <= width:
+        return text[:width] + ("..." if len(text) > width else "")
+
+    begin = max(0, position - width // 3)
+    end = begin + width
+    return ("..." if begin > 0 else "") + text[begin:end] + ("..." if end < len(text) else "")
+
+
+class SearchIndex:
+    """持久化在 SQLite FTS5 中的全文索引，覆盖所有已生成摘要的视频字幕和摘要
+
+    文本先经过 tokenize 切分（中日韩文字按单字和双字），再写入 FTS5 倒排表，
+    因此中文内容也能按词检索。每个视频的内容可以增量替换。
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def close(self):
+        self.conn.close()
+
+    def _migrate(self):
+        """倒排表不存在或版本过旧时，根据 documents 中的原文重建"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == INDEX_VERSION:
+            return
+
+        with self.conn:
+            self.conn.execute("DROP TABLE IF EXISTS documents_fts")
+            self.conn.execute(FTS_SCHEMA)
+            self.conn.executemany(
+                "INSERT INTO documents_fts (rowid, tokens) VALUES (?, ?)",
+                ((doc_id, " ".join(tokenize(text))) for doc_id, text in self.conn.execute("SELECT id, text FROM documents"))
+            )
+            self.conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self.conn.execute("VACUUM")
+
+    def _replace(self, video_id, language, kind, rows):
+        """删除视频某一类内容的旧记录并写入新记录，rows 为 (start, text) 列表"""
+        old_rows = self.conn.execute(
+            "SELECT id, text FROM documents WHERE video_id = ? AND language = ? AND kind = ?",
+            (video_id, language, kind)
+        ).fetchall()
+        if old_rows:
+            # 不保存内容的倒排表需要提供原来写入的分词结果才能删除
+            self.conn.executemany(
+                "INSERT INTO documents_fts (documents_fts, rowid, tokens) VALUES ('delete', ?, ?)",
+                [(doc_id, " ".join(tokenize(text))) for doc_id, text in old_rows]
+            )
+            ids = [doc_id for doc_id, _ in old_rows]
+            placeholders = ",".join("?" * len(ids))
+            self.conn.execute(f"DELETE FROM documents WHERE id IN ({placeholders})", ids)
+
+        now = time.time()
+        for start, text in rows:
+            cursor = self.conn.execute(
+                "INSERT INTO documents (video_id, language, kind, start, text, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, language, kind, start, text, now)
+            )
+            self.conn.execute(
+                "INSERT INTO documents_fts (rowid, tokens) VALUES (?, ?)",
+                (cursor.lastrowid, " ".join(tokenize(text)))
+            )
+
+    def add_video(self, video_id, language, segments=None, summary=None, summary_type="summary"):
+        """增量更新一个视频的字幕片段和/或摘要"""
+        with self.lock, self.conn:
+            if segments:
+                rows = [(c["start"], c["text"]) for c in chunk_segments(segments)]
+                self._replace(video_id, language, "transcript", rows)
+            if summary:
+                self._replace(video_id, language, summary_type, [(0.0, summary)])
+
+    def search(self, query, limit=20, snippets_per_video=3, candidates=2000):
+        """检索视频，返回按相关度排序的视频列表，每个视频附带带时间戳的命中片段
+
+        只对最近写入的 candidates 个命中片段计算排序，避免常见词对全部命中结果打分；
+        命中数少于该值的查询仍然是完整排序。
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        with self.lock:
+            rows = self.conn.execute(
+                """
+                SELECT d.id, d.video_id, d.language, d.kind, d.start, m.score
+                FROM (
+                    SELECT rowid, bm25(documents_fts) AS score
+                    FROM documents_fts
+                    WHERE documents_fts MATCH ?
+                    ORDER BY rowid DESC
+                    LIMIT ?
+                ) m JOIN documents d ON d.id = m.rowid
+                ORDER BY m.score
+                """,
+                (match, candidates)
+            ).fetchall()
+
+            # bm25() 越小越相关，这里取反后按视频聚合
+            videos = {}
+            for doc_id, video_id, language, kind, start, score in rows:
+                video = videos.get(video_id)
+                if video is None:
+                    video = videos[video_id] = {"video_id": video_id, "score": 0.0, "hits": 0, "snippets": []}
+                video["score"] += -score
+                video["hits"] += 1
+                if len(video["snippets"]) < snippets_per_video:
+                    video["snippets"].append({"id": doc_id, "language": language, "kind": kind, "start": start})
+
+            results = sorted(videos.values(), key=lambda v: v["score"], reverse=True)[:limit]
+
+            # 只读取最终返回的片段原文
+            snippets = [snippet for video in results for snippet in video["snippets"]]
+            placeholders = ",".join("?" * len(snippets))
+            texts = dict(self.conn.execute(
+                f"SELECT id, text FROM documents WHERE id IN ({placeholders})",
+                [snippet["id"] for snippet in snippets]
+            ))
+
+        for snippet in snippets:
+            snippet["text"] = make_snippet(texts[snippet.pop("id")], query)
+        return results
+
+    def count_videos(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(DISTINCT video_id) FROM documents").fetchone()[0]
@@ -0,0 +1,119 @@
+import math
+import re
+import heapq
+from collections import Counter, defaultdict
+
+# 中日韩字符范围（汉字、假名、谚文），这些文字没有空格分词
+CJK_RANGES = (
+    "\u3040-\u30ff"  # 平假名、片假名
+    "\u3400-\u4dbf"  # 汉字扩展A
+    "\u4e00-\u9fff"  # 常用汉字
+    "\uac00-\ud7af"  # 谚文音节
+    "\uf900-\ufaff"  # 兼容汉字
+)
+# 拉丁文字分支需排除中日韩字符，否则 "python编程" 会被当作一个词
+TOKEN_PATTERN = re.compile(f"[{CJK_RANGES}]+|(?:(?![{CJK_RANGES}])[^\\W_])+")
+CJK_PATTERN = re.compile(f"[{CJK_RANGES}]")
+
+
+def tokenize(text):
+    """将文本切分为检索词：拉丁文字按单词切分并转小写，中日韩文字按单字和相邻双字切分"""
+    tokens = []
+    if not text:
+        return tokens
+
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        word = match.group(0)
+        if CJK_PATTERN.match(word):
+            tokens.extend(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+
+    return tokens
+
+
+def format_timestamp(seconds):
+    """将秒数格式化为 mm:ss 或 hh:mm:ss"""
+    seconds = int(seconds or 0)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def chunk_segments(segments, window_seconds=60, max_chars=800):
+    """将带时间戳的字幕片段合并为检索用的文本块
+
+    每个块包含 start、end 和 text，块的长度受时间窗口和字符数共同限制。
+    """
+    chunks = []
+    current = None
+
+    for segment in segments or []:
+        text = (segment.get("text") or "").strip()
+        if not text:
+            continue
+        start = float(segment.get("start") or 0.0)
+        end = start + float(segment.get("duration") or 0.0)
+
+        if current and (end - current["start"] > window_seconds or len(current["text"]) + len(text) > max_chars):
+            chunks.append(current)
+            current = None
+
+        if current is None:
+            current = {"start": start, "end": end, "text": text}
+        else:
+            current["end"] = max(current["end"], end)
+            current["text"] += " " + text
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+class BM25Index:
+    """基于倒排表的 BM25 检索索引，构建一次后可重复查询"""
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+
+        for doc_id, chunk in enumerate(self.chunks):
+            counts = Counter(tokenize(chunk["text"]))
+            self.doc_lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self.postings[token].append((doc_id, tf))
+
+        total = len(self.doc_lengths)
+        self.avg_doc_length = (sum(self.doc_lengths) / total) if total else 0.0
+        self.idf = {
+            token: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def search(self, query, top_k=5):
+        """返回与查询最相关的 top_k 个文本块，按得分降序排列"""
+        if not self.chunks:
+            return []
+
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = self.idf[token]
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_doc_length or 1.0))
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [dict(self.chunks[doc_id], score=score) for doc_id, score in best]